@@ -6,18 +6,26 @@ __all__ = [
     "Code",
 ]
 
+import hashlib
 import html
 import os
 import re
+from functools import lru_cache
+from itertools import groupby
+from operator import itemgetter
 from pathlib import Path
 
 import numpy as np
+from pygments import __version__ as pygments_version
+from pygments import format as pygments_format
 from pygments import highlight
 from pygments.formatters.html import HtmlFormatter
-from pygments.lexers import get_lexer_by_name, guess_lexer_for_filename
+from pygments.lexer import Lexer
+from pygments.lexers import find_lexer_class_by_name, guess_lexer_for_filename
 from pygments.styles import get_all_styles
+from pygments.token import Token
 
-from manim import logger
+from manim import config
 from manim.constants import *
 from manim.mobject.geometry.arc import Dot
 from manim.mobject.geometry.polygram import RoundedRectangle
@@ -26,6 +34,23 @@ from manim.mobject.text.text_mobject import Paragraph
 from manim.mobject.types.vectorized_mobject import VGroup
 from manim.utils.color import WHITE
 
+# background colors of the styles whose uncolored text has to be drawn in white
+_DARK_BACKGROUND_COLORS = frozenset({"#111111", "#272822", "#202020", "#000000"})
+
+
+class _StylesList:
+    """Descriptor providing the names of all pygments styles on first access.
+
+    Looking up the styles scans the pygments style plugins, so this is deferred
+    until :attr:`.Code.styles_list` is actually used instead of import time.
+    """
+
+    def __get__(self, instance, owner) -> list[str]:
+        styles_list = list(get_all_styles())
+        # replace the descriptor, later lookups get the list directly
+        setattr(owner, "styles_list", styles_list)
+        return styles_list
+
 
 class Code(VGroup):
     """A highlighted source code listing.
@@ -155,7 +180,7 @@ class Code(VGroup):
     # For more information about pygments.lexers visit https://pygments.org/docs/lexers/
     # from pygments.lexers import get_all_lexers
     # all_lexers = get_all_lexers()
-    styles_list = list(get_all_styles())
+    styles_list = _StylesList()
     # For more information about pygments.styles visit https://pygments.org/docs/styles/
 
     def __init__(
@@ -208,7 +233,7 @@ class Code(VGroup):
         self.file_name = file_name
         if self.file_name:
             self._ensure_valid_file()
-            self.code_string = self.file_path.read_text(encoding="utf-8")
+            self.code_string = _read_code_file(self.file_path)
         elif code:
             self.code_string = code
         else:
@@ -287,6 +312,15 @@ class Code(VGroup):
             )
         self.move_to(np.array([0, 0, 0]))
 
+    @staticmethod
+    def clear_cache():
+        """Remove the highlighted html cached by :class:`.Code` from ``config.text_dir``."""
+        dir_name = config.get_dir("text_dir")
+        if not dir_name.is_dir():
+            return
+        for cache_file in dir_name.glob("code_*.html"):
+            cache_file.unlink()
+
     def _ensure_valid_file(self):
         """Function to validate file."""
         if self.file_name is None:
@@ -296,7 +330,7 @@ class Code(VGroup):
             Path(self.file_name).expanduser(),
         ]
         for path in possible_paths:
-            if path.exists():
+            if path.is_file():
                 self.file_path = path
                 return
         error = (
@@ -339,14 +373,12 @@ class Code(VGroup):
         :class:`~.Paragraph`
             The generated code according to parameters.
         """
-        lines_text = []
-        for line_no in range(0, self.code_json.__len__()):
-            line_str = ""
-            for word_index in range(self.code_json[line_no].__len__()):
-                line_str = line_str + self.code_json[line_no][word_index][0]
-            lines_text.append(self.tab_spaces[line_no] * "\t" + line_str)
+        lines_text = [
+            self.tab_spaces[line_no] * "\t" + "".join(text for text, _ in line)
+            for line_no, line in enumerate(self.code_json)
+        ]
         code = Paragraph(
-            *list(lines_text),
+            *lines_text,
             line_spacing=self.line_spacing,
             tab_width=self.tab_width,
             font_size=self.font_size,
@@ -355,28 +387,67 @@ class Code(VGroup):
             stroke_width=self.stroke_width,
             warn_missing_font=self.warn_missing_font,
         )
-        for line_no in range(code.__len__()):
-            line = code.chars[line_no]
-            line_char_index = self.tab_spaces[line_no]
-            for word_index in range(self.code_json[line_no].__len__()):
-                line[
-                    line_char_index : line_char_index
-                    + self.code_json[line_no][word_index][0].__len__()
-                ].set_color(self.code_json[line_no][word_index][1])
-                line_char_index += self.code_json[line_no][word_index][0].__len__()
+        lines = code.chars.submobjects
+        for line_no, line in enumerate(self.code_json):
+            start = self.tab_spaces[line_no]
+            for text, color in line:
+                end = start + text.__len__()
+                # color the characters directly instead of a VGroup sliced from the line
+                for char in lines[line_no].submobjects[start:end]:
+                    char.set_color(color)
+                start = end
         return code
 
-    def _gen_html_string(self):
-        """Function to generate html string with code highlighted and stores in variable html_string."""
-        self.html_string = _hilite_me(
+    def _code2hash(self, divstyles: str) -> str:
+        """Generates ``sha256`` hash for the file name of the cached html."""
+        settings = (
             self.code_string,
             self.language,
             self.style,
             self.insert_line_no,
-            "border:solid gray;border-width:.1em .1em .1em .8em;padding:.2em .6em;",
-            self.file_path,
+            divstyles,
+            self.file_path.name if self.file_path else None,
             self.line_no_from,
+            pygments_version,
+        )
+        hasher = hashlib.sha256()
+        hasher.update(repr(settings).encode())
+        return hasher.hexdigest()[:16]
+
+    def _gen_html_string(self):
+        """Function to generate html string with code highlighted and stores in variable html_string.
+
+        The highlighted html only depends on the code and the highlighting options,
+        so it is cached in ``config.text_dir`` and reused by later renders.
+        """
+        divstyles = (
+            "border:solid gray;border-width:.1em .1em .1em .8em;padding:.2em .6em;"
         )
+        dir_name = config.get_dir("text_dir")
+        dir_name.mkdir(parents=True, exist_ok=True)
+        file_name = dir_name / f"code_{self._code2hash(divstyles)}.html"
+
+        if file_name.exists():
+            self.html_string = file_name.read_text(encoding="utf-8")
+        else:
+            self.html_string = _hilite_me(
+                self.code_string,
+                self.language,
+                self.style,
+                self.insert_line_no,
+                divstyles,
+                self.file_path,
+                self.line_no_from,
+            )
+            # write to a temporary file first, so that concurrent renders never
+            # read a partially written cache file
+            temp_file = file_name.with_suffix(f".{os.getpid()}.tmp")
+            try:
+                temp_file.write_text(self.html_string, encoding="utf-8")
+                os.replace(temp_file, file_name)
+            except BaseException:
+                temp_file.unlink(missing_ok=True)
+                raise
 
         if self.generate_html_file:
             output_folder = Path() / "assets" / "codes" / "generated_html_files"
@@ -388,31 +459,23 @@ class Code(VGroup):
         background_color is just background color of displayed code.
         code_json is 2d array with rows as line numbers
         and columns as a array with length 2 having text and text's color value.
+        Consecutive pieces of text sharing the same color are merged into one entry.
         tab_spaces is 2d array with rows as line numbers
         and columns as corresponding number of indentation_chars in front of that line in code.
         """
-        if (
-            self.background_color == "#111111"
-            or self.background_color == "#272822"
-            or self.background_color == "#202020"
-            or self.background_color == "#000000"
-        ):
+        if self.background_color in _DARK_BACKGROUND_COLORS:
             self.default_color = "#ffffff"
         else:
             self.default_color = "#000000"
         # print(self.default_color,self.background_color)
-        for i in range(3, -1, -1):
-            self.html_string = self.html_string.replace("</" + " " * i, "</")
+        self.html_string = re.sub("</ +", "</", self.html_string)
 
         # handle pygments bug
         # https://github.com/pygments/pygments/issues/961
         self.html_string = self.html_string.replace("<span></span>", "")
 
-        for i in range(10, -1, -1):
-            self.html_string = self.html_string.replace(
-                "</span>" + " " * i,
-                " " * i + "</span>",
-            )
+        # move whitespace following a closing tag into the span
+        self.html_string = re.sub("</span>( +)", r"\1</span>", self.html_string)
         self.html_string = self.html_string.replace("background-color:", "background:")
 
         if self.insert_line_no:
@@ -430,6 +493,8 @@ class Code(VGroup):
         self.code_json = []
         self.tab_spaces = []
         code_json_line_index = -1
+        default_color = self.default_color
+        unescape = html.unescape
         for line_index in range(0, lines.__len__()):
             # print(lines[line_index])
             self.code_json.append([])
@@ -457,30 +522,32 @@ class Code(VGroup):
                         "\t" * indentation_chars_count + lines[line_index][start_point:]
                     )
             indentation_chars_count = 0
-            if lines[line_index]:
-                while lines[line_index][indentation_chars_count] == "\t":
-                    indentation_chars_count = indentation_chars_count + 1
+            while (
+                indentation_chars_count < lines[line_index].__len__()
+                and lines[line_index][indentation_chars_count] == "\t"
+            ):
+                indentation_chars_count = indentation_chars_count + 1
             self.tab_spaces.append(indentation_chars_count)
             # print(lines[line_index])
             lines[line_index] = self._correct_non_span(lines[line_index])
             # print(lines[line_index])
-            words = lines[line_index].split("<span")
-            for word_index in range(1, words.__len__()):
-                color_index = words[word_index].find("color:")
-                if color_index == -1:
-                    color = self.default_color
-                else:
-                    starti = words[word_index][color_index:].find("#")
-                    color = words[word_index][
-                        color_index + starti : color_index + starti + 7
-                    ]
-                start_point = words[word_index].find(">")
-                end_point = words[word_index].find("</span>")
-                text = words[word_index][start_point + 1 : end_point]
-                text = html.unescape(text)
-                if text != "":
-                    # print(text, "'" + color + "'")
-                    self.code_json[code_json_line_index].append([text, color])
+            spans = []
+            for word in lines[line_index].split("<span")[1:]:
+                start_point = word.find(">")
+                spans.append(
+                    (
+                        unescape(word[start_point + 1 : word.find("</span>")]),
+                        _get_span_color(word[:start_point]) or default_color,
+                    ),
+                )
+            # merge consecutive spans of the same color into a single run
+            self.code_json[code_json_line_index] = [
+                ["".join(text for text, _ in run), color]
+                for color, run in groupby(
+                    (span for span in spans if span[0] != ""),
+                    key=itemgetter(1),
+                )
+            ]
         # print(self.code_json)
 
     def _correct_non_span(self, line_str: str):
@@ -496,43 +563,48 @@ class Code(VGroup):
         :class:`str`
             The generated html element's string with having color attributes.
         """
+        default_span = '<span style="color:' + self.default_color + '">'
         words = line_str.split("</span>")
-        line_str = ""
         for i in range(0, words.__len__()):
             if i != words.__len__() - 1:
                 j = words[i].find("<span")
             else:
                 j = words[i].__len__()
-            temp = ""
-            starti = -1
-            for k in range(0, j):
-                if words[i][k] == "\t" and starti == -1:
-                    continue
-                else:
-                    if starti == -1:
-                        starti = k
-                    temp = temp + words[i][k]
+            # text in front of the next span, without its leading tabs
+            temp = words[i][: max(j, 0)].lstrip("\t")
             if temp != "":
+                starti = j - temp.__len__()
                 if i != words.__len__() - 1:
-                    temp = (
-                        '<span style="color:'
-                        + self.default_color
-                        + '">'
-                        + words[i][starti:j]
-                        + "</span>"
-                    )
+                    temp = default_span + words[i][starti:j] + "</span>"
                 else:
-                    temp = (
-                        '<span style="color:'
-                        + self.default_color
-                        + '">'
-                        + words[i][starti:j]
-                    )
-                temp = temp + words[i][j:]
-                words[i] = temp
-            if words[i] != "":
-                line_str = line_str + words[i] + "</span>"
-        return line_str
+                    temp = default_span + words[i][starti:j]
+                words[i] = temp + words[i][j:]
+        return "".join(word + "</span>" for word in words if word != "")
+
+
+def _read_code_file(file_path: Path, encoding: str = "utf-8") -> str:
+    """Function to read a code file into a string.
+
+    The file is opened unbuffered, so that it is read in a single call into a
+    bytes object presized from the file size, and decoded once afterwards.
+
+    Parameters
+    ---------
+    file_path
+        Path of code file.
+    encoding
+        Encoding of the code file.
+
+    Returns
+    -------
+    :class:`str`
+        The content of the file, with line endings normalized to ``"\\n"``.
+    """
+    with file_path.open("rb", buffering=0) as f:
+        code = f.read().decode(encoding)
+    if "\r" in code:
+        code = code.replace("\r\n", "\n").replace("\r", "\n")
+    return code
 
 
 def _hilite_me(
@@ -566,29 +638,73 @@ def _hilite_me(
     style = style or "colorful"
     defstyles = "overflow:auto;width:auto;"
 
-    formatter = HtmlFormatter(
-        style=style,
-        linenos=False,
-        noclasses=True,
-        cssclass="",
-        cssstyles=defstyles + divstyles,
-        prestyles="margin: 0",
-    )
-    if language is None and file_path:
-        lexer = guess_lexer_for_filename(file_path, code)
-        html = highlight(code, lexer, formatter)
-    elif language is None:
+    formatter = _get_html_formatter(style, defstyles + divstyles)
+    if language is not None:
+        lexer = _get_lexer_by_name(language)
+    elif file_path:
+        # the analysers of pygments look at shebangs, modelines and keywords
+        # near the start of the code, so the rest of a long file is not needed
+        lexer = _guess_lexer_for_filename(file_path, code[:4096])
+    else:
         raise ValueError(
             "The code language has to be specified when rendering a code string",
         )
+    if code.strip():
+        html = highlight(code, lexer, formatter)
     else:
-        html = highlight(code, get_lexer_by_name(language, **{}), formatter)
+        # whitespace-only code has nothing to lex, so it is passed to the
+        # formatter as a single token, normalized like a lexer would do it
+        code = code.replace("\r\n", "\n").replace("\r", "\n").strip("\n") + "\n"
+        html = pygments_format([(Token.Text, code)], formatter)
     if insert_line_no:
         html = _insert_line_numbers_in_html(html, line_no_from)
     html = "<!-- HTML generated by Code() -->" + html
     return html
 
 
+# The helpers below are cached at module level: the pygments objects and the
+# parsed span colors only depend on their arguments, so they are shared by
+# all Code objects instead of being rebuilt for every listing.
+
+
+@lru_cache(maxsize=None)
+def _get_span_color(span_style: str) -> str | None:
+    """Return the (cached) text color set in the style of a html span, if any."""
+    match = re.search(r"color:\s*(#[0-9a-fA-F]+)", span_style)
+    return match.group(1) if match else None
+
+
+@lru_cache(maxsize=None)
+def _get_html_formatter(style: str, cssstyles: str) -> HtmlFormatter:
+    """Return a (cached) html formatter for the given style."""
+    return HtmlFormatter(
+        style=style,
+        linenos=False,
+        noclasses=True,
+        cssclass="",
+        cssstyles=cssstyles,
+        prestyles="margin: 0",
+    )
+
+
+@lru_cache(maxsize=None)
+def _get_lexer_instance(lexer_cls: type[Lexer]) -> Lexer:
+    """Return a (cached) instance of the given lexer class."""
+    return lexer_cls()
+
+
+@lru_cache(maxsize=None)
+def _get_lexer_by_name(language: str) -> Lexer:
+    """Return a (cached) lexer instance for the given language alias."""
+    return _get_lexer_instance(find_lexer_class_by_name(language))
+
+
+@lru_cache(maxsize=32)
+def _guess_lexer_for_filename(file_path: Path, code: str) -> Lexer:
+    """Return a (cached) lexer guessed from the file name and its contents."""
+    return _get_lexer_instance(type(guess_lexer_for_filename(file_path, code)))
+
+
 def _insert_line_numbers_in_html(html: str, line_no_from: int):
     """Function that inserts line numbers in the highlighted HTML code.
 
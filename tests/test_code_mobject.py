@@ -1,5 +1,15 @@
+import re
+import shutil
+
+import pytest
+from pygments.util import ClassNotFound
+
+from manim import config
+from manim.mobject.text import code_mobject
 from manim.mobject.text.code_mobject import Code
 
+CODE = "def test(x):\n    return x\n"
+
 
 def test_code_indentation():
     co = Code(
@@ -13,3 +23,99 @@ def test_code_indentation():
 
     assert co.tab_spaces[0] == 1
     assert co.tab_spaces[1] == 2
+
+
+def test_code_whitespace_only():
+    co = Code(code="  \n\t\n", language="python", insert_line_no=False)
+
+    assert co.tab_spaces == [0, 1]
+    assert co.code_json == [[["  ", co.default_color]], []]
+
+
+def test_code_whitespace_only_invalid_language():
+    with pytest.raises(ClassNotFound):
+        Code(code="  \n", language="not-a-lang")
+
+
+def test_code_json_merges_same_color_runs():
+    co = Code(
+        code="x = foo(1, 2)\n",
+        language="Python",
+    )
+
+    for line in co.code_json:
+        colors = [color for _, color in line]
+        assert all(a != b for a, b in zip(colors, colors[1:]))
+
+
+def test_code_json_colors_are_hex():
+    co = Code(
+        code=CODE,
+        language="Python",
+        style="emacs",
+    )
+
+    for line in co.code_json:
+        for _, color in line:
+            assert re.fullmatch("#[0-9a-fA-F]{3}|#[0-9a-fA-F]{6}", color)
+
+
+def test_code_styles_list():
+    assert "vim" in Code.styles_list
+    assert Code.styles_list is Code.styles_list
+
+
+def test_code_html_is_cached(monkeypatch):
+    text_dir = config.get_dir("text_dir")
+    Code(code=CODE, language="python")
+    assert len(list(text_dir.glob("code_*.html"))) == 1
+
+    def hilite_me(*args):
+        raise AssertionError("cached html should have been used")
+
+    monkeypatch.setattr(code_mobject, "_hilite_me", hilite_me)
+    Code(code=CODE, language="python")
+
+
+@pytest.mark.parametrize(
+    "option",
+    [
+        {"style": "emacs"},
+        {"language": "cpp"},
+        {"insert_line_no": False},
+        {"line_no_from": 5},
+    ],
+)
+def test_code_html_cache_depends_on_options(option):
+    text_dir = config.get_dir("text_dir")
+    Code(code=CODE, **{"language": "python", **option})
+    Code(code=CODE, language="python")
+    assert len(list(text_dir.glob("code_*.html"))) == 2
+
+
+def test_code_html_cache_leaves_no_temporary_files():
+    text_dir = config.get_dir("text_dir")
+    Code(code=CODE, language="python")
+    assert list(text_dir.glob("*.tmp")) == []
+
+
+def test_code_html_cache_removes_temporary_file_on_failed_write(monkeypatch):
+    text_dir = config.get_dir("text_dir")
+
+    def replace(*args):
+        raise OSError("failed write")
+
+    monkeypatch.setattr(code_mobject.os, "replace", replace)
+    with pytest.raises(OSError, match="failed write"):
+        Code(code=CODE, language="python")
+    assert list(text_dir.glob("*.tmp")) == []
+
+
+def test_code_clear_cache():
+    text_dir = config.get_dir("text_dir")
+    Code(code=CODE, language="python")
+    Code.clear_cache()
+    assert list(text_dir.glob("code_*.html")) == []
+
+    shutil.rmtree(text_dir)
+    Code.clear_cache()